@@ -1,4 +1,5 @@
 from bs4 import BeautifulSoup
+import soupsieve
 import requests
 import pytest
 
@@ -6,9 +7,14 @@ from .exceptions import ArticleNotFound
 from .html_tools import remove_buzz_attrs, remove_buzz_tags, remove_all_tags
 
 
+ARTICLE_SELECTOR = soupsieve.compile('article.article')
+BUZZ_SELECTOR = soupsieve.compile(
+    '.article-disclaimer, footer.article-footer, aside')
+
+
 def sanitize(html, plaintext=False):
-    soup = BeautifulSoup(html, 'html.parser')
-    articles = soup.select("article.article")
+    soup = BeautifulSoup(html, 'lxml')
+    articles = ARTICLE_SELECTOR.select(soup)
 
     if len(articles) != 1:
         raise ArticleNotFound()
@@ -16,12 +22,7 @@ def sanitize(html, plaintext=False):
     article = articles[0]
     article.attrs = {}
 
-    buzz_blocks = [
-        *article.select('.article-disclaimer'),
-        *article.select('footer.article-footer'),
-        *article.select('aside'),
-    ]
-    for el in buzz_blocks:
+    for el in BUZZ_SELECTOR.select(article):
         el.decompose()
 
     remove_buzz_attrs(article)
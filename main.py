@@ -1,17 +1,22 @@
-import aiohttp
 import asyncio
 
+from news_analyzer import NewsAnalyzer, FILE_SOURCE
 
-async def fetch(session, url):
-    async with session.get(url) as response:
-        response.raise_for_status()
-        return await response.text()
+
+NEWS_LINKS = [
+    'https://inosmi.ru/economic/20211020/250738803.html',
+    'https://inosmi.ru/economic/20211020/250737979.html',
+    'https://inosmi.ru/economic/20211019/250735502.html',
+    'https://inosmi.ru/economic/20211019/250734190.html',
+    'https://inosmi.ru/economic/20211019/250730340.html',
+]
 
 
 async def main():
-    async with aiohttp.ClientSession() as session:
-        html = await fetch(session, 'http://example.com')
-        print(html)
+    analyzer = NewsAnalyzer(news_links=NEWS_LINKS,
+                            vocabulary_source=FILE_SOURCE, timeout_sec=5)
+    await analyzer.run()
 
 
-asyncio.run(main())
+if __name__ == '__main__':
+    asyncio.run(main())
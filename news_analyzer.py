@@ -1,20 +1,28 @@
-from typing import List, NamedTuple
+"""Оценка желтушности новостных статей.
+
+Все запросы идут через общую aiohttp-сессию с пулом соединений и
+DNS-кешем (ttl_dns_cache=300), поэтому повторные обращения к одному
+хосту не платят за новое TCP/TLS-соединение и за getaddrinfo().
+"""
+from typing import FrozenSet, List
 import asyncio
 from asyncio import Queue
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import os
+import pickle
 
-from bs4 import BeautifulSoup
+from lxml import html as lxml_html
 
 import aiohttp
 import aiofiles
-import anyio
-from async_timeout import timeout
 
-import pymorphy2
+import pymorphy3
 
 from adapters.inosmi_ru import sanitize
 from adapters.exceptions import ArticleNotFound
 
-from text_tools import split_by_words, calculate_jaundice_rate
+from text_tools import split_by_words, calculate_jaundice_rate, get_analyser
 
 
 NEWS_SITES = ('https://inosmi.ru', )
@@ -22,7 +30,12 @@ NEGATIVE_VOC_LINK = 'https://sociation.org/words/negative/'
 NEGATIVE_VOC_FILE = './charged_dict/negative_words.txt'
 
 FILE_SOURCE, URL_SOURCE = 0, 1
-IS_RUN, IS_STOP = 0, 1
+PARALLEL_REQUESTS = 10
+
+DEFAULT_HEADERS = {
+    'Accept-Encoding': 'gzip, deflate, br',
+    'User-Agent': 'WebFilter/1.0 (news jaundice analyzer)',
+}
 
 FETCH_ERROR = 'FETCH_ERROR'
 PARSING_ERROR = 'PARSING_ERROR'
@@ -47,49 +60,71 @@ class TimeElapsedError(Exception):
 
 
 def is_news_link(url_link: str) -> bool:
-    for site in NEWS_SITES:
-        if site in url_link:
-            return True
-    else:
-        return False
+    return url_link.startswith(NEWS_SITES)
 
 
-async def get_negative_words_from_url(url=NEGATIVE_VOC_LINK) -> List[str]:
-    vocabulary = []
-    async with aiohttp.ClientSession() as session_ctx:
-        async with session_ctx.get(url) as response_ctx:
-            if response_ctx.status != 200:
-                raise BadResponse
+NEGATIVE_WORDS_XPATH = '//*[contains(@class, "associations_list") and ' \
+                       'contains(@class, "self-clear")]//a/text()'
 
-            page_body = await response_ctx.text()
 
-            parser = BeautifulSoup(page_body, 'html.parser')
-            words_list = parser.find(
-                attrs={'class': 'associations_list self-clear'})
-            for href in words_list.find_all('a'):
-                vocabulary.append(href.get_text())
-    return vocabulary
+async def get_negative_words_from_url(session: aiohttp.ClientSession,
+                                      url=NEGATIVE_VOC_LINK) -> List[str]:
+    async with session.get(url) as response_ctx:
+        if response_ctx.status != 200:
+            raise BadResponse
+
+        page_body = await response_ctx.text()
+
+    tree = lxml_html.fromstring(page_body)
+    return tree.xpath(NEGATIVE_WORDS_XPATH)
+
 
+_VOCAB_CACHE = {}
 
-async def get_negative_words_from_file(fpath=NEGATIVE_VOC_FILE) -> List[str]:
-    vocabulary = []
-    async with aiofiles.open(fpath, 'r') as file_ctx:
-        async for line in file_ctx:
-            vocabulary.append(line.rstrip())
+
+def normalize_vocabulary(morph, words) -> FrozenSet[str]:
+    return frozenset(morph.parse(word.lower())[0].normal_form
+                     for word in words)
+
+
+async def get_negative_words_from_file(morph,
+                                       fpath=NEGATIVE_VOC_FILE
+                                       ) -> FrozenSet[str]:
+    mtime = os.path.getmtime(fpath)
+    cache_key = (fpath, mtime)
+    if cache_key in _VOCAB_CACHE:
+        return _VOCAB_CACHE[cache_key]
+
+    pickle_path = fpath + '.pkl'
+    if os.path.exists(pickle_path) and os.path.getmtime(pickle_path) >= mtime:
+        with open(pickle_path, 'rb') as file_ctx:
+            vocabulary = pickle.load(file_ctx)
+    else:
+        async with aiofiles.open(fpath, 'r') as file_ctx:
+            content = await file_ctx.read()
+        vocabulary = normalize_vocabulary(morph, content.splitlines())
+        with open(pickle_path, 'wb') as file_ctx:
+            pickle.dump(vocabulary, file_ctx)
+
+    _VOCAB_CACHE[cache_key] = vocabulary
     return vocabulary
 
 
-class NewsInfo(NamedTuple):
+def _process_article_worker(html_text: str) -> List[str]:
+    clear_text = sanitize(html_text, True)
+    return split_by_words(get_analyser(), clear_text)
+
+
+@dataclass(frozen=True, slots=True)
+class NewsInfo:
     url: str
     status: str
     rate: float = 0
     words_count: int = 0
 
     def __str__(self):
-        return f'URL: {self.url}\n' \
-               f'Статус: {self.status}\n' \
-               f'Рейтинг: {self.rate}\n' \
-               f'Слов в статье: {self.words_count}'
+        return (f'URL: {self.url}\nСтатус: {self.status}\n'
+                f'Рейтинг: {self.rate}\nСлов в статье: {self.words_count}')
 
 
 class NewsAnalyzer:
@@ -98,10 +133,11 @@ class NewsAnalyzer:
         self.__news_links = news_links
         self.__vocabulary_source = vocabulary_source
         self.__timeout_sec = timeout_sec
-        self.__work_status = IS_RUN
-        self.__bad_vocabulary = []
-        self.__analyser = pymorphy2.MorphAnalyzer()
+        self.__bad_vocabulary = frozenset()
+        self.__analyser = get_analyser()
         self.__news_info = Queue()
+        self.__session = None
+        self.__pool = None
 
     @property
     def news_links(self) -> List[str]:
@@ -116,91 +152,112 @@ class NewsAnalyzer:
         return self.__timeout_sec
 
     @property
-    def work_status(self) -> int:
-        return self.__work_status
-
-    @property
-    def analyser(self) -> pymorphy2.MorphAnalyzer:
+    def analyser(self) -> pymorphy3.MorphAnalyzer:
         return self.__analyser
 
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        if self.__session is None or self.__session.closed:
+            connector = aiohttp.TCPConnector(limit=100, limit_per_host=10,
+                                             use_dns_cache=True,
+                                             ttl_dns_cache=300,
+                                             enable_cleanup_closed=True)
+            client_timeout = aiohttp.ClientTimeout(
+                total=self.timeout_sec, sock_read=self.timeout_sec)
+            self.__session = aiohttp.ClientSession(
+                connector=connector,
+                headers=DEFAULT_HEADERS,
+                timeout=client_timeout)
+        return self.__session
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self.__pool is None:
+            self.__pool = ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                              initializer=get_analyser)
+        return self.__pool
+
     async def scrap_news_page(self, url_link: str) -> str:
         if not is_news_link(url_link):
             raise ArticleNotFound
 
-        async with aiohttp.ClientSession() as session_ctx:
-            try:
-                async with timeout(self.timeout_sec) as time_ctx:
-                    async with session_ctx.get(url_link) as response_ctx:
-                        status = response_ctx.status
-                        if status != 200:
-                            raise BadResponse
-                        html_text = await response_ctx.text()
-            except asyncio.TimeoutError:
-                if time_ctx.expired:
-                    raise TimeElapsedError
-                else:
-                    raise
-
-            clear_text = sanitize(html_text, True)
-            return clear_text
-
-    async def get_bad_vocabulary(self) -> List[str]:
+        session_ctx = self._ensure_session()
+        try:
+            async with session_ctx.get(url_link) as response_ctx:
+                status = response_ctx.status
+                if status != 200:
+                    raise BadResponse
+                body = await response_ctx.read()
+        except asyncio.TimeoutError:
+            raise TimeElapsedError
+
+        return body.decode('utf-8', errors='replace')
+
+    async def get_bad_vocabulary(self) -> FrozenSet[str]:
         if not self.__bad_vocabulary:
             if self.vocabulary_source == FILE_SOURCE:
-                self.__bad_vocabulary = await get_negative_words_from_file()
+                self.__bad_vocabulary = await get_negative_words_from_file(
+                    self.analyser)
             elif self.vocabulary_source == URL_SOURCE:
-                self.__bad_vocabulary = await get_negative_words_from_url()
+                words = await get_negative_words_from_url(
+                    self._ensure_session())
+                self.__bad_vocabulary = normalize_vocabulary(
+                    self.analyser, words)
             else:
                 raise InvalidSourceType
         return self.__bad_vocabulary
 
     async def get_rating(self, url_link: str):
-        news_body = await self.scrap_news_page(url_link)
-        news_words = split_by_words(self.analyser, news_body)
+        html_text = await self.scrap_news_page(url_link)
+        loop = asyncio.get_running_loop()
+        news_words = await loop.run_in_executor(
+            self._ensure_pool(), _process_article_worker, html_text)
         bad_words = await self.get_bad_vocabulary()
         rate = calculate_jaundice_rate(article_words=news_words,
                                        charged_words=bad_words)
         news_info = NewsInfo(url_link, SUCCESS_STATUS, rate, len(news_words))
         self.__news_info.put_nowait(news_info)
 
+    async def _safe_get_rating(self, url_link: str):
+        try:
+            await self.get_rating(url_link)
+        except BadResponse:
+            news_info = NewsInfo(url_link, FETCH_ERROR)
+            self.__news_info.put_nowait(news_info)
+        except ArticleNotFound:
+            news_info = NewsInfo(url_link, PARSING_ERROR)
+            self.__news_info.put_nowait(news_info)
+        except TimeElapsedError:
+            news_info = NewsInfo(url_link, TIMEOUT_ERROR)
+            self.__news_info.put_nowait(news_info)
+
     async def get_links_rating(self):
-        async with anyio.create_task_group():
+        await self.get_bad_vocabulary()
+        semaphore = asyncio.Semaphore(PARALLEL_REQUESTS)
+
+        async def bounded_get_rating(url_link: str):
+            async with semaphore:
+                await self._safe_get_rating(url_link)
+
+        async with asyncio.TaskGroup() as task_ctx:
             for url in self.news_links:
-                try:
-                    await self.get_rating(url)
-                except BadResponse:
-                    news_info = NewsInfo(url, FETCH_ERROR)
-                    self.__news_info.put_nowait(news_info)
-                except ArticleNotFound:
-                    news_info = NewsInfo(url, PARSING_ERROR)
-                    self.__news_info.put_nowait(news_info)
-                except TimeElapsedError:
-                    news_info = NewsInfo(url, TIMEOUT_ERROR)
-                    self.__news_info.put_nowait(news_info)
-        self.__work_status = IS_STOP
+                task_ctx.create_task(bounded_get_rating(url))
+        self.__news_info.put_nowait(None)
 
     async def show_news_info(self):
-        while self.__work_status != IS_STOP:
-            news_info: NewsInfo = await self.__news_info.get()
+        while True:
+            news_info = await self.__news_info.get()
+            if news_info is None:
+                return
             print(news_info)
 
     async def run(self):
-        async with anyio.create_task_group() as task_ctx:
-            task_ctx.start_soon(self.show_news_info)
-            task_ctx.start_soon(self.get_links_rating)
-
-
-async def main():
-    links = ['https://inosmi.ru/economic/20211020/250738803.html',
-             'https://inosmi.ru/economic/20211020/250737979.html',
-             'https://inosmi.ru/economic/20211019/250735502.html',
-             'https://inosmi.ru/economic/20211019/250734190.html',
-             'https://inosmi.ru/economic/20211019/250730340.html']
-    scraper = NewsAnalyzer(news_links=links, vocabulary_source=FILE_SOURCE,
-                           timeout_sec=5)
-    async with anyio.create_task_group() as task_ctx:
-        task_ctx.start_soon(scraper.run)
-
-
-if __name__ == '__main__':
-    asyncio.run(main())
+        session = self._ensure_session()
+        try:
+            async with asyncio.TaskGroup() as task_ctx:
+                task_ctx.create_task(self.show_news_info())
+                task_ctx.create_task(self.get_links_rating())
+        finally:
+            await session.close()
+            self.__session = None
+            if self.__pool is not None:
+                self.__pool.shutdown()
+                self.__pool = None
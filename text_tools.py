@@ -1,13 +1,26 @@
-import pymorphy2
-import string
+from collections import Counter
+from functools import lru_cache
+import re
 
+import pymorphy3
 
-def _clean_word(word):
-    signs = ['«', '»', '…', '№', '%', ':', ';', '(', ')', '-']
-    for sign in signs:
-        word = word.replace(sign, '')
-    word = word.strip(string.punctuation)
-    return word
+
+_ANALYSER = None
+
+_WORD_RE = re.compile(r'[а-яёa-z]+(?:-[а-яёa-z]+)*', re.IGNORECASE)
+
+
+def get_analyser() -> pymorphy3.MorphAnalyzer:
+    """Возвращает общий для всего процесса экземпляр MorphAnalyzer."""
+    global _ANALYSER
+    if _ANALYSER is None:
+        _ANALYSER = pymorphy3.MorphAnalyzer()
+    return _ANALYSER
+
+
+@lru_cache(maxsize=200_000)
+def _cached_normal_form(token):
+    return get_analyser().parse(token)[0].normal_form
 
 
 def split_by_words(morph, text):
@@ -15,9 +28,8 @@ def split_by_words(morph, text):
     Учитывает знаки пунктуации, регистр и словоформы, выкидывает предлоги.
     """
     words = []
-    for word in text.split():
-        cleaned_word = _clean_word(word)
-        normalized_word = morph.parse(cleaned_word)[0].normal_form
+    for token in _WORD_RE.findall(text.lower()):
+        normalized_word = _cached_normal_form(token)
         if len(normalized_word) > 2 or normalized_word == 'не':
             words.append(normalized_word)
     return words
@@ -26,7 +38,7 @@ def split_by_words(morph, text):
 def test_split_by_words():
     # Экземпляры MorphAnalyzer занимают 10-15Мб RAM т.к. загружают в память много данных
     # Старайтесь организовать свой код так, чтоб создавать экземпляр MorphAnalyzer заранее и в единственном числе
-    morph = pymorphy2.MorphAnalyzer()
+    morph = get_analyser()
 
     assert split_by_words(morph, 'Во-первых, он хочет, чтобы') == ['во-первых', 'хотеть', 'чтобы']
 
@@ -39,9 +51,14 @@ def calculate_jaundice_rate(article_words, charged_words):
     if not article_words:
         return 0.0
 
-    found_charged_words = [word for word in article_words if word in set(charged_words)]
+    if not isinstance(charged_words, (set, frozenset)):
+        charged_words = frozenset(charged_words)
+
+    counter = Counter(article_words)
+    found_count = sum(counter[word]
+                      for word in counter.keys() & charged_words)
 
-    score = len(found_charged_words) / len(article_words) * 100
+    score = found_count / len(article_words) * 100
 
     return round(score, 2)
 